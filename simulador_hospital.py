@@ -1,14 +1,20 @@
 #!/usr/bin/env python3
 """
 Simulador de Hospital usando threads e semáforos para controle de recursos
+(com --modo eventos, o mesmo fluxo roda como simulação por eventos discretos)
 """
+import _thread
+import argparse
+import heapq
+import os
+import sys
 import threading
 import time
 import random
-from datetime import datetime
-from queue import Queue
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from queue import SimpleQueue
 from dataclasses import dataclass
-from typing import Optional
 
 # Configuração dos recursos e parâmetros
 N_MEDICOS = 5
@@ -16,8 +22,13 @@ N_SALAS_CIRURGIA = 2
 N_LEITOS = 10
 N_PACIENTES = 10  # Reduzido para melhor visualização
 
-# Configuração das filas de espera
-MAX_TENTATIVAS = 3  # Número máximo de tentativas após timeout
+# Tempo máximo total da simulação (em segundos) antes do watchdog abortar:
+# TEMPO_MAX_POR_PACIENTE por paciente, nunca menos que TEMPO_MAX_SIMULACAO
+TEMPO_MAX_SIMULACAO = 30 * 60
+TEMPO_MAX_POR_PACIENTE = 60.0
+
+def tempo_max_padrao(n_patientes):
+    return max(TEMPO_MAX_SIMULACAO, TEMPO_MAX_POR_PACIENTE * n_patientes)
 
 # Tempos de cada procedimento (em segundos)
 TEMPO_CONSULTA_MIN, TEMPO_CONSULTA_MAX = 30.0, 45.0
@@ -25,34 +36,166 @@ TEMPO_EXAME_MIN, TEMPO_EXAME_MAX = 25.0, 35.0
 TEMPO_CIRURGIA_MIN, TEMPO_CIRURGIA_MAX = 40.0, 60.0
 TEMPO_LEITO_MIN, TEMPO_LEITO_MAX = 35.0, 50.0
 
+# Delay entre mensagens exibidas (em segundos), ajustável por --delay-log
+LOG_DELAY = 0.5
+
+# Separador impresso após cada mensagem
+LOG_SEPARADOR = "----------------------------"
+
 # Probabilidades dos procedimentos
 P_PROB_EXAME = 0.6
 P_PROB_CIRURGIA = 0.3
 P_PROB_CIRURGIA_DIRECT = 0.05
 
-# Semáforos para controle de recursos
-medicos_sem = threading.Semaphore(N_MEDICOS)
-salas_sem = threading.Semaphore(N_SALAS_CIRURGIA)
-leitos_sem = threading.Semaphore(N_LEITOS)
+# Semente para o sorteio das decisões e durações dos pacientes
+SEED = 42
+
+class FastSemaphore:
+    # Semáforo contador feito direto sobre _thread.allocate_lock, sem threading.Condition:
+    # um lock protege o contador e cada thread bloqueada espera no seu próprio lock
+    def __init__(self, value=1):
+        if value < 0:
+            raise ValueError("semaphore initial value must be >= 0")
+        self._value = value
+        self._mutex = _thread.allocate_lock()
+        self._waiters = deque()
+        self._prioritarios = deque()  # atendidos antes de qualquer waiter comum (FIFO)
+
+    def acquire(self, blocking=True, timeout=None, prioritario=False):
+        with self._mutex:
+            if self._value > 0:
+                self._value -= 1
+                return True
+            if not blocking:
+                return False
+            waiter = _thread.allocate_lock()
+            waiter.acquire()
+            fila = self._prioritarios if prioritario else self._waiters
+            fila.append(waiter)
+        # bloqueia até um release() entregar a vaga diretamente a esta thread
+        try:
+            if waiter.acquire(True, -1 if timeout is None else timeout):
+                return True
+        except BaseException:
+            # interrompido (ex.: KeyboardInterrupt): sai da fila, ou devolve a vaga
+            # se release() já a tinha entregue, para nenhuma vaga se perder
+            if not self._desiste(fila, waiter):
+                self.release()
+            raise
+        if self._desiste(fila, waiter):
+            return False
+        # release() entregou a vaga logo depois do timeout
+        return True
+
+    def _desiste(self, fila, waiter):
+        # tira o waiter da fila; False se release() já o tinha retirado (vaga entregue)
+        with self._mutex:
+            try:
+                fila.remove(waiter)
+            except ValueError:
+                return False
+        return True
+
+    def release(self):
+        with self._mutex:
+            if self._prioritarios:
+                self._prioritarios.popleft().release()
+            elif self._waiters:
+                # passa a vaga direto para a próxima thread da fila
+                self._proximo_waiter().release()
+            else:
+                self._value += 1
 
-# Filas de espera para recursos
-fila_medicos = Queue()
-fila_salas = Queue()
-fila_leitos = Queue()
+    def _proximo_waiter(self):
+        # chamado com _mutex adquirido; ordem FIFO
+        return self._waiters.popleft()
 
-# Lock para imprimir sem entrelaçar linhas
-print_lock = threading.Lock()
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
+
+class LifoSemaphore(FastSemaphore):
+    # Acorda primeiro a thread que chegou por último (ainda "quente" em cache);
+    # a cada FIFO_A_CADA liberações acorda a mais antiga, para nenhuma esperar para sempre
+    FIFO_A_CADA = 1000
+
+    def __init__(self, value=1):
+        super().__init__(value)
+        self._entregas = 0
+
+    def _proximo_waiter(self):
+        self._entregas += 1
+        if self._entregas % self.FIFO_A_CADA == 0:
+            return self._waiters.popleft()
+        return self._waiters.pop()
+
+def reserva_sala_e_medico(sala_sem, medico_sem):
+    # Reserva sala e médico para uma cirurgia, sempre na ordem sala -> médico. Não é uma
+    # reserva atômica: a sala fica com o paciente enquanto ele espera médico, mas essa espera
+    # tem prioridade (o próximo médico liberado vai para ele), então a sala fica parada no
+    # máximo até a próxima liberação de médico
+    sala_sem.acquire()
+    try:
+        medico_sem.acquire(prioritario=True)
+    except BaseException:
+        # interrompido antes de receber o médico (acquire já devolveu qualquer vaga): devolve a sala
+        sala_sem.release()
+        raise
+
+# Semáforos para controle de recursos
+medicos_sem = LifoSemaphore(N_MEDICOS)
+salas_sem = LifoSemaphore(N_SALAS_CIRURGIA)
+leitos_sem = LifoSemaphore(N_LEITOS)
+
+# Fila de mensagens de log; uma única thread escreve, então as linhas não se entrelaçam
+_log_q = SimpleQueue()
 
 @dataclass
-class SolicitacaoRecurso:
-    paciente_id: int
-    tentativas: int = 0
-    event_complete: Optional[threading.Event] = None
-    recurso_obtido: threading.Event = None
+class PlanoPaciente:
+    # decisões e durações sorteadas de antemão para um paciente
+    fazer_exame: bool
+    cirurgia_direta: bool
+    cirurgia_apos_exame: bool
+    exame_com_medico: bool
+    leito_sem_cirurgia: bool
+    leito_com_medico: bool
+    dur_consulta: float
+    dur_exame: float
+    dur_cirurgia: float
+    dur_leito: float
+    dur_medico_leito: float
+
+def sorteia_planos(n, seed):
+    # Sorteia cada decisão/duração em lote (uma coluna por vez) e monta uma linha por paciente.
+    # Cada paciente tem seu próprio gerador, semeado pelo par (seed, pid): o plano de um paciente
+    # não depende de quantos pacientes existem nem da ordem dos sorteios dos outros, e
+    # sementes diferentes dão planos independentes
+    rnds = [random.Random(f"{seed}:{pid}").random for pid in range(1, n + 1)]
+
+    def prob(p):
+        return [rnd() < p for rnd in rnds]
 
-    def __post_init__(self):
-        if self.recurso_obtido is None:
-            self.recurso_obtido = threading.Event()
+    def dur(lo, hi):
+        # o mesmo que Random.uniform(lo, hi), sem a chamada extra por sorteio
+        span = hi - lo
+        return [lo + span * rnd() for rnd in rnds]
+
+    colunas = (
+        prob(P_PROB_EXAME),
+        prob(P_PROB_CIRURGIA_DIRECT),
+        prob(P_PROB_CIRURGIA),
+        prob(0.3),   # exame precisa de médico
+        prob(0.05),  # leito mesmo sem cirurgia
+        prob(0.2),   # médico acompanha no leito
+        dur(TEMPO_CONSULTA_MIN, TEMPO_CONSULTA_MAX),
+        dur(TEMPO_EXAME_MIN, TEMPO_EXAME_MAX),
+        dur(TEMPO_CIRURGIA_MIN, TEMPO_CIRURGIA_MAX),
+        dur(TEMPO_LEITO_MIN, TEMPO_LEITO_MAX),
+        dur(0.5, 1.5),
+    )
+    return [PlanoPaciente(*linha) for linha in zip(*colunas)]
 
 class Colors:
     PACIENTE = '\033[94m'
@@ -61,293 +204,386 @@ class Colors:
     LEITO = '\033[93m'
     RESET = '\033[0m'
 
-# Função de log com timestamp, cores e delay
-def log(msg):
-    with print_lock:
-        ts = datetime.now().strftime("%H:%M:%S")
-        # Adiciona cores baseado no tipo de mensagem
-        if "médico" in msg.lower():
-            color = Colors.MEDICO
-        elif "sala" in msg.lower():
-            color = Colors.SALA
-        elif "leito" in msg.lower():
-            color = Colors.LEITO
-        else:
-            color = Colors.PACIENTE
-            
-        print(f"[{ts}] {color}{msg}{Colors.RESET}")
-        # Pequeno delay após cada log para melhor visualização
-        time.sleep(0.5)  # Aumentado o delay entre mensagens para 0.5 segundos
-        print("----------------------------")
+# Cache do último timestamp formatado (segundo inteiro -> "HH:MM:SS")
+_ts_cache = {}
+
+def _timestamp():
+    t = int(time.time())
+    ts = _ts_cache.get(t)
+    if ts is None:
+        ts = time.strftime("%H:%M:%S", time.localtime(t))
+        # guarda só o segundo atual para o cache não crescer
+        _ts_cache.clear()
+        _ts_cache[t] = ts
+    return ts
+
+# Função de log com timestamp e cores (apenas enfileira a mensagem)
+# msg + tail: permite passar um prefixo pronto (ex.: "Paciente 3") sem montar f-string
+# color: escolhida por quem chama, de acordo com o recurso envolvido na mensagem
+def log(msg, tail="", color=Colors.PACIENTE):
+    if tail:
+        msg = msg + tail
+    ts = _timestamp()
+    # mensagem e separador num único buffer -> uma única escrita
+    _log_q.put(f"[{ts}] {color}{msg}{Colors.RESET}\n{LOG_SEPARADOR}\n")
+
+def _escreve_log(delay):
+    # Consumidor da fila de log: o delay só atrasa a exibição, nunca os pacientes
+    while True:
+        buf = _log_q.get()
+        if buf is None:
+            break
+        sys.stdout.write(buf)
+        if delay > 0:
+            # Pequeno delay após cada log para melhor visualização
+            sys.stdout.flush()
+            time.sleep(delay)
+        elif _log_q.empty():
+            # sem delay, só força a saída quando a fila esvazia: uma rajada de mensagens
+            # vira poucas escritas no terminal em vez de uma por mensagem
+            sys.stdout.flush()
+    sys.stdout.flush()
+
+def inicia_log(delay=LOG_DELAY):
+    t = threading.Thread(target=_escreve_log, args=(delay,), name="Log", daemon=True)
+    t.start()
+    return t
+
+def encerra_log(log_thread):
+    # Sinaliza fim e espera a thread de log esvaziar a fila
+    _log_q.put(None)
+    log_thread.join()
 
 # -------------------------
 # Classe Patient
 # -------------------------
 class Patient:
-    def __init__(self, pid):
-        self.pid = pid # ID do paciente
-        # eventos para encadear atividades (simula threads dentro de um "processo")
-        self.consulta_done = threading.Event()
-        self.exames_done = threading.Event()
-        self.cirurgia_done = threading.Event()
-        self.leito_done = threading.Event()
-
-    def start(self):
-        # Inicia a "execução do processo paciente" criando uma thread principal
-        t = threading.Thread(target=self.run_process, name=f"Paciente-{self.pid}")
-        t.start()
-        return t
+    __slots__ = ('_prefix', 'plano')
+
+    def __init__(self, pid, plano):
+        self._prefix = f"Paciente {pid}" # prefixo das mensagens de log (identifica o paciente pelo pid)
+        self.plano = plano # decisões e durações já sorteadas
 
     def run_process(self):
-        consulta_thread = threading.Thread(target=self.thread_consulta, name=f"Consulta-{self.pid}")
-        consulta_thread.start()
-        self.consulta_done.wait()
-        log(f"Paciente {self.pid} finalizou sua consulta inicial")
+        # as atividades de um paciente são estritamente sequenciais, então
+        # executam diretamente na thread do paciente (sem thread/evento extra)
+        self.thread_consulta()
+        log(self._prefix, " finalizou sua consulta inicial")
 
         # Decide o fluxo do paciente
-        fazer_exame = random.random() < P_PROB_EXAME
+        plano = self.plano
+        fazer_exame = plano.fazer_exame
         fazer_cirurgia = False
 
         # pequena chance de ir direto pra cirurgia sem exames
-        if random.random() < P_PROB_CIRURGIA_DIRECT:
+        if plano.cirurgia_direta:
             fazer_cirurgia = True
 
         # se fez exames, então cirurgia pode vir depois dos exames
         if fazer_exame:
-            exame_thread = threading.Thread(target=self.thread_exame, name=f"Exame-{self.pid}")
-            exame_thread.start()
-            self.exames_done.wait()
+            self.thread_exame()
             # após exames, decidir se precisa cirurgia
-            if random.random() < P_PROB_CIRURGIA:
+            if plano.cirurgia_apos_exame:
                 fazer_cirurgia = True
 
         # se precisa cirurgia, executa
         if fazer_cirurgia:
-            cirurgia_thread = threading.Thread(target=self.thread_cirurgia, name=f"Cirurgia-{self.pid}")
-            cirurgia_thread.start()
-            self.cirurgia_done.wait()
+            self.thread_cirurgia()
             # após cirurgia, precisa de leito
-            leito_thread = threading.Thread(target=self.thread_leito, name=f"Leito-{self.pid}")
-            leito_thread.start()
-            self.leito_done.wait()
+            self.thread_leito()
         else:
             # pode ainda precisar de leito em casos raros (simulação)
-            if random.random() < 0.05:
-                leito_thread = threading.Thread(target=self.thread_leito, name=f"Leito-{self.pid}")
-                leito_thread.start()
-                self.leito_done.wait()
+            if plano.leito_sem_cirurgia:
+                self.thread_leito()
 
 
     def thread_consulta(self):
-        log(f"Paciente {self.pid}: aguardando médico para consulta")
-        acquired = medicos_sem.acquire(timeout=30)
-        if not acquired:
-            log(f"Paciente {self.pid}: entrando na fila de espera para consulta")
-            solicitacao = SolicitacaoRecurso(
-                paciente_id=self.pid,
-                event_complete=self.consulta_done
-            )
-            fila_medicos.put(solicitacao)
-            # Aguarda até conseguir o recurso ou atingir máximo de tentativas
-            if not solicitacao.recurso_obtido.wait(timeout=180):  # 3 minutos de espera máxima
-                log(f"Paciente {self.pid}: desistiu de esperar por médico na consulta")
-                self.consulta_done.set()
-                return
-            acquired = True  # Se chegou aqui, conseguiu o recurso
-        try:
-            log(f"Paciente {self.pid}: em consulta (médico alocado)")
-            dur = random.uniform(TEMPO_CONSULTA_MIN, TEMPO_CONSULTA_MAX)
+        log(self._prefix, ": aguardando médico para consulta", color=Colors.MEDICO)
+        with medicos_sem:
+            log(self._prefix, ": em consulta (médico alocado)", color=Colors.MEDICO)
+            dur = self.plano.dur_consulta
             time.sleep(dur)
-            log(f"Paciente {self.pid}: consulta finalizada (duração {dur:.2f}s)")
-        finally:
-            medicos_sem.release()
-            self.consulta_done.set()
+            log(self._prefix, f": consulta finalizada (duração {dur:.2f}s)")
 
     def thread_exame(self):
         # Exames podem ou não precisar de médico (simulamos que alguns não)
-        precisa_medico = random.random() < 0.3
+        precisa_medico = self.plano.exame_com_medico
         if precisa_medico:
-            log(f"Paciente {self.pid}: aguardando médico para exame")
-            acquired = medicos_sem.acquire(timeout=30)
-            if not acquired:
-                log(f"Paciente {self.pid}: tempo de espera por médico excedido no exame")
-                self.exames_done.set()
-                return
-            try:
-                log(f"Paciente {self.pid}: realizando exame com médico")
-                dur = random.uniform(TEMPO_EXAME_MIN, TEMPO_EXAME_MAX)
+            log(self._prefix, ": aguardando médico para exame", color=Colors.MEDICO)
+            with medicos_sem:
+                log(self._prefix, ": realizando exame com médico", color=Colors.MEDICO)
+                dur = self.plano.dur_exame
                 time.sleep(dur)
-                log(f"Paciente {self.pid}: exame com médico finalizado ({dur:.2f}s)")
-            finally:
-                medicos_sem.release()
-                self.exames_done.set()
+                log(self._prefix, f": exame com médico finalizado ({dur:.2f}s)", color=Colors.MEDICO)
         else:
-            log(f"Paciente {self.pid}: realizando exame (sem médico necessário)")
-            dur = random.uniform(TEMPO_EXAME_MIN, TEMPO_EXAME_MAX)
+            log(self._prefix, ": realizando exame (sem médico necessário)")
+            dur = self.plano.dur_exame
             time.sleep(dur)
-            log(f"Paciente {self.pid}: exame finalizado ({dur:.2f}s)")
-            self.exames_done.set()
+            log(self._prefix, f": exame finalizado ({dur:.2f}s)")
 
     def thread_cirurgia(self):
-        # precisa de sala e médico. Para evitar starvation/deadlock, adquira sempre na ordem:
-        # 1) salas_sem, 2) medicos_sem  (todas as threads seguem mesma ordem)
-        log(f"Paciente {self.pid}: aguardando sala de cirurgia")
-        sala_acquired = salas_sem.acquire(timeout=60)
-        if not sala_acquired:
-            log(f"Paciente {self.pid}: entrando na fila de espera para sala de cirurgia")
-            solicitacao_sala = SolicitacaoRecurso(
-                paciente_id=self.pid
-            )
-            fila_salas.put(solicitacao_sala)
-            if not solicitacao_sala.recurso_obtido.wait(timeout=180):
-                log(f"Paciente {self.pid}: desistiu de esperar por sala de cirurgia")
-                self.cirurgia_done.set()
-                return
-            sala_acquired = True
+        # precisa de sala e médico ao mesmo tempo. reserva_sala_e_medico pega a sala e espera
+        # médico com prioridade, então a sala fica parada o mínimo possível
+        log(self._prefix, ": aguardando sala de cirurgia e médico", color=Colors.SALA)
+        reserva_sala_e_medico(salas_sem, medicos_sem)
         try:
-            log(f"Paciente {self.pid}: sala de cirurgia alocada, aguardando médico")
-            medico_acquired = medicos_sem.acquire(timeout=60)
-            if not medico_acquired:
-                log(f"Paciente {self.pid}: não conseguiu médico após alocar sala (liberando sala)")
-                return  # sala será liberada no finally
-            try:
-                log(f"Paciente {self.pid}: cirurgia iniciada (sala+medico alocados)")
-                dur = random.uniform(TEMPO_CIRURGIA_MIN, TEMPO_CIRURGIA_MAX)
-                time.sleep(dur)
-                log(f"Paciente {self.pid}: cirurgia finalizada ({dur:.2f}s)")
-            finally:
-                medicos_sem.release()
-                self.cirurgia_done.set()
+            log(self._prefix, ": cirurgia iniciada (sala+medico alocados)", color=Colors.SALA)
+            dur = self.plano.dur_cirurgia
+            time.sleep(dur)
+            log(self._prefix, f": cirurgia finalizada ({dur:.2f}s)", color=Colors.SALA)
         finally:
+            medicos_sem.release()
             salas_sem.release()
 
     def thread_leito(self):
-        log(f"Paciente {self.pid}: aguardando leito")
-        acquired = leitos_sem.acquire(timeout=120)
-        if not acquired:
-            log(f"Paciente {self.pid}: entrando na fila de espera para leito")
-            solicitacao = SolicitacaoRecurso(
-                paciente_id=self.pid,
-                event_complete=self.leito_done
-            )
-            fila_leitos.put(solicitacao)
-            if not solicitacao.recurso_obtido.wait(timeout=240):  # 4 minutos de espera máxima
-                log(f"Paciente {self.pid}: desistiu de esperar por leito (alta sem leito!)")
-                self.leito_done.set()
-                return
-            acquired = True
-        try:
-            log(f"Paciente {self.pid}: leito alocado")
+        log(self._prefix, ": aguardando leito", color=Colors.LEITO)
+        with leitos_sem:
+            log(self._prefix, ": leito alocado", color=Colors.LEITO)
             # opcionalmente, leito pode requerer acompanhamento médico por um curto período
-            precisa_medico = random.random() < 0.2
+            precisa_medico = self.plano.leito_com_medico
             if precisa_medico:
-                log(f"Paciente {self.pid}: aguardando médico para acompanhar no leito")
-                acquired_med = medicos_sem.acquire(timeout=60)
-                if acquired_med:
-                    try:
-                        dur_med = random.uniform(0.5, 1.5)
-                        time.sleep(dur_med)
-                        log(f"Paciente {self.pid}: médico acompanhou no leito ({dur_med:.2f}s)")
-                    finally:
-                        medicos_sem.release()
-                else:
-                    log(f"Paciente {self.pid}: não veio médico para acompanhar no leito")
+                log(self._prefix, ": aguardando médico para acompanhar no leito", color=Colors.MEDICO)
+                with medicos_sem:
+                    dur_med = self.plano.dur_medico_leito
+                    time.sleep(dur_med)
+                    log(self._prefix, f": médico acompanhou no leito ({dur_med:.2f}s)", color=Colors.MEDICO)
             # permanece no leito por algum tempo
-            dur_leito = random.uniform(TEMPO_LEITO_MIN, TEMPO_LEITO_MAX)
+            dur_leito = self.plano.dur_leito
             time.sleep(dur_leito)
-            log(f"Paciente {self.pid}: alta do leito após {dur_leito:.2f}s")
-        finally:
-            leitos_sem.release()
-            self.leito_done.set()
+            log(self._prefix, f": alta do leito após {dur_leito:.2f}s", color=Colors.LEITO)
 
 # -------------------------
-# Processamento de Filas de Espera
+# Watchdog
 # -------------------------
-def processa_fila_medicos():
-    while True:
-        try:
-            solicitacao = fila_medicos.get(timeout=1)  # timeout de 1s para permitir término
-            if medicos_sem.acquire(timeout=30):
-                solicitacao.recurso_obtido.set()
-            else:
-                solicitacao.tentativas += 1
-                if solicitacao.tentativas < MAX_TENTATIVAS:
-                    fila_medicos.put(solicitacao)  # retorna para a fila
-                else:
-                    log(f"Paciente {solicitacao.paciente_id}: máximo de tentativas excedido para médico")
-                    if solicitacao.event_complete:
-                        solicitacao.event_complete.set()
-        except Exception:
-            continue
-
-def processa_fila_salas():
-    while True:
-        try:
-            solicitacao = fila_salas.get(timeout=1)
-            if salas_sem.acquire(timeout=30):
-                solicitacao.recurso_obtido.set()
-            else:
-                solicitacao.tentativas += 1
-                if solicitacao.tentativas < MAX_TENTATIVAS:
-                    fila_salas.put(solicitacao)
-                else:
-                    log(f"Paciente {solicitacao.paciente_id}: máximo de tentativas excedido para sala")
-                    if solicitacao.event_complete:
-                        solicitacao.event_complete.set()
-        except Exception:
-            continue
-
-def processa_fila_leitos():
-    while True:
-        try:
-            solicitacao = fila_leitos.get(timeout=1)
-            if leitos_sem.acquire(timeout=30):
-                solicitacao.recurso_obtido.set()
-            else:
-                solicitacao.tentativas += 1
-                if solicitacao.tentativas < MAX_TENTATIVAS:
-                    fila_leitos.put(solicitacao)
-                else:
-                    log(f"Paciente {solicitacao.paciente_id}: máximo de tentativas excedido para leito")
-                    if solicitacao.event_complete:
-                        solicitacao.event_complete.set()
-        except Exception:
-            continue
-
-def inicia_processamento_filas():
-    # Inicia threads para processar cada fila
-    threading.Thread(target=processa_fila_medicos, daemon=True).start()
-    threading.Thread(target=processa_fila_salas, daemon=True).start()
-    threading.Thread(target=processa_fila_leitos, daemon=True).start()
+def inicia_watchdog(fim, limite):
+    # Rede de segurança única no lugar dos timeouts em cada acquire:
+    # se a simulação não terminar dentro do orçamento, encerra o processo
+    def vigia():
+        if not fim.wait(limite):
+            sys.stderr.write(f"Watchdog: simulação excedeu {limite:g}s, encerrando processo\n")
+            sys.stderr.flush()
+            os._exit(1)
+
+    threading.Thread(target=vigia, name="Watchdog", daemon=True).start()
 
 # -------------------------
 # Simulação
 # -------------------------
-def run_simulation(n_patientes=N_PACIENTES):
+def run_simulation(n_patientes=N_PACIENTES, log_delay=LOG_DELAY, seed=SEED, tempo_max=None):
+    log_thread = inicia_log(log_delay)
     log(f"=== INICIANDO SIMULAÇÃO DO HOSPITAL ===")
     log(f"Recursos disponíveis:")
-    log(f"- {N_MEDICOS} médicos para atendimento")
-    log(f"- {N_SALAS_CIRURGIA} salas de cirurgia")
-    log(f"- {N_LEITOS} leitos para internação")
+    log(f"- {N_MEDICOS} médicos para atendimento", color=Colors.MEDICO)
+    log(f"- {N_SALAS_CIRURGIA} salas de cirurgia", color=Colors.SALA)
+    log(f"- {N_LEITOS} leitos para internação", color=Colors.LEITO)
     log(f"Total de {N_PACIENTES} pacientes aguardando atendimento")
     log("=======================================")
     
-    # Inicia as threads que processam as filas de espera
-    inicia_processamento_filas()
-    
-    patients = [Patient(i+1) for i in range(n_patientes)]
-    threads = [p.start() for p in patients]
-    
-    log(">>> Todos os pacientes foram registrados e aguardam atendimento")
+    fim = threading.Event()
+    if tempo_max is None:
+        tempo_max = tempo_max_padrao(n_patientes)
+    if tempo_max > 0:  # 0 (ou menos) desativa o watchdog
+        inicia_watchdog(fim, tempo_max)
 
-    # aguardando todos pacientes terminarem (join das threads que executam o processo)
-    for t in threads:
-        t.join()
+    # todas as decisões aleatórias são sorteadas aqui, antes das threads começarem
+    planos = sorteia_planos(n_patientes, seed)
+    patients = [Patient(i+1, plano) for i, plano in enumerate(planos)]
 
-    log("=== SIMULAÇÃO CONCLUÍDA ===")
-    log("Todos os pacientes foram atendidos e liberados")
-    log("=======================================")
+    try:
+        # uma thread por paciente, reaproveitadas por um pool criado uma única vez
+        # (pelo menos 1 worker: com 0 pacientes o pool só não recebe tarefas)
+        with ThreadPoolExecutor(max_workers=max(n_patientes, 1), thread_name_prefix="Paciente") as executor:
+            processos = executor.map(lambda p: p.run_process(), patients)
+            log(">>> Todos os pacientes foram registrados e aguardam atendimento")
+
+            # aguardando todos pacientes terminarem (consome os resultados do pool)
+            list(processos)
+
+        log("=== SIMULAÇÃO CONCLUÍDA ===")
+        log("Todos os pacientes foram atendidos e liberados")
+        log("=======================================")
+    finally:
+        # mesmo se um paciente falhar: desarma o watchdog e esvazia a fila de log
+        fim.set()
+        encerra_log(log_thread)
+
+# -------------------------
+# Simulação por eventos discretos
+# -------------------------
+# Etapas de um paciente (cada etapa espera por um recurso e depois dura um tempo)
+(ETAPA_CONSULTA, ETAPA_EXAME, ETAPA_CIRURGIA,
+ ETAPA_LEITO, ETAPA_LEITO_MEDICO, ETAPA_REPOUSO, ETAPA_ALTA) = range(7)
+
+# Índices dos recursos
+RECURSO_MEDICO, RECURSO_SALA, RECURSO_LEITO = range(3)
+
+def run_simulation_eventos(n_patientes=N_PACIENTES, seed=SEED):
+    # Mesmo fluxo e mesmos planos da versão com threads, mas com tempo simulado:
+    # nenhuma thread nem sleep, "agora" é um float avançado por uma fila de eventos (heapq)
+    planos = sorteia_planos(n_patientes, seed)
+
+    # estado dos pacientes em SoA: uma lista por campo, indexada pelo paciente
+    etapa = [ETAPA_CONSULTA] * n_patientes
+    t_pedido = [0.0] * n_patientes  # quando começou a esperar pelo recurso atual
+    espera = [0.0] * n_patientes    # tempo total esperando por recursos
+    precisa_cirurgia = [p.cirurgia_direta or (p.fazer_exame and p.cirurgia_apos_exame) for p in planos]
+
+    livres = [N_MEDICOS, N_SALAS_CIRURGIA, N_LEITOS]
+    filas = [deque(), deque(), deque()]  # FIFO de pacientes esperando cada recurso
+    fila_cirurgia = deque()  # pacientes que já têm sala, esperando médico com prioridade
+    eventos = []  # heap de (instante, seq, paciente): fim da etapa atual do paciente
+    seq = 0
+    agora = 0.0
+    saida = []
+
+    def registra(i, msg):
+        saida.append(f"[t={agora:8.2f}s] Paciente {i+1}: {msg}\n")
+
+    def agenda(i, dur):
+        nonlocal seq
+        heapq.heappush(eventos, (agora + dur, seq, i))
+        seq += 1
+
+    def pede(r, i):
+        t_pedido[i] = agora
+        if livres[r] > 0:
+            livres[r] -= 1
+            inicia(i)
+        else:
+            filas[r].append(i)
+
+    def libera(r):
+        if r == RECURSO_MEDICO and fila_cirurgia:
+            # mesma política do reserva_sala_e_medico: quem já tem sala recebe o médico primeiro
+            inicia(fila_cirurgia.popleft())
+        elif filas[r]:
+            j = filas[r].popleft()
+            if r == RECURSO_SALA:
+                sala_alocada(j)
+            else:
+                inicia(j)
+        else:
+            livres[r] += 1
+
+    def pede_cirurgia(i):
+        t_pedido[i] = agora
+        if livres[RECURSO_SALA] > 0:
+            livres[RECURSO_SALA] -= 1
+            sala_alocada(i)
+        else:
+            filas[RECURSO_SALA].append(i)
+
+    def sala_alocada(i):
+        if livres[RECURSO_MEDICO] > 0:
+            livres[RECURSO_MEDICO] -= 1
+            inicia(i)
+        else:
+            fila_cirurgia.append(i)
+
+    def inicia(i):
+        # recurso da etapa atual concedido ao paciente i
+        espera[i] += agora - t_pedido[i]
+        plano = planos[i]
+        e = etapa[i]
+        if e == ETAPA_CONSULTA:
+            registra(i, "em consulta (médico alocado)")
+            agenda(i, plano.dur_consulta)
+        elif e == ETAPA_EXAME:
+            registra(i, "realizando exame")
+            agenda(i, plano.dur_exame)
+        elif e == ETAPA_CIRURGIA:
+            registra(i, "cirurgia iniciada (sala+medico alocados)")
+            agenda(i, plano.dur_cirurgia)
+        elif e == ETAPA_LEITO:
+            registra(i, "leito alocado")
+            if plano.leito_com_medico:
+                etapa[i] = ETAPA_LEITO_MEDICO
+                pede(RECURSO_MEDICO, i)
+            else:
+                etapa[i] = ETAPA_REPOUSO
+                agenda(i, plano.dur_leito)
+        elif e == ETAPA_LEITO_MEDICO:
+            agenda(i, plano.dur_medico_leito)
+
+    def avanca(i, e):
+        etapa[i] = e
+        if e == ETAPA_EXAME:
+            if planos[i].exame_com_medico:
+                pede(RECURSO_MEDICO, i)
+            else:
+                t_pedido[i] = agora
+                inicia(i)
+        elif e == ETAPA_CIRURGIA:
+            pede_cirurgia(i)
+        elif e == ETAPA_LEITO:
+            pede(RECURSO_LEITO, i)
+        elif e == ETAPA_ALTA:
+            registra(i, "liberado")
+
+    def apos_exame(i):
+        if precisa_cirurgia[i]:
+            avanca(i, ETAPA_CIRURGIA)
+        elif planos[i].leito_sem_cirurgia:
+            avanca(i, ETAPA_LEITO)
+        else:
+            avanca(i, ETAPA_ALTA)
+
+    # todos os pacientes chegam no instante 0 pedindo médico para a consulta
+    for i in range(n_patientes):
+        pede(RECURSO_MEDICO, i)
+
+    while eventos:
+        agora, _, i = heapq.heappop(eventos)
+        plano = planos[i]
+        e = etapa[i]
+        if e == ETAPA_CONSULTA:
+            registra(i, f"consulta finalizada (duração {plano.dur_consulta:.2f}s)")
+            libera(RECURSO_MEDICO)
+            if plano.fazer_exame:
+                avanca(i, ETAPA_EXAME)
+            else:
+                apos_exame(i)
+        elif e == ETAPA_EXAME:
+            registra(i, f"exame finalizado ({plano.dur_exame:.2f}s)")
+            if plano.exame_com_medico:
+                libera(RECURSO_MEDICO)
+            apos_exame(i)
+        elif e == ETAPA_CIRURGIA:
+            registra(i, f"cirurgia finalizada ({plano.dur_cirurgia:.2f}s)")
+            libera(RECURSO_MEDICO)
+            libera(RECURSO_SALA)
+            avanca(i, ETAPA_LEITO)
+        elif e == ETAPA_LEITO_MEDICO:
+            registra(i, f"médico acompanhou no leito ({plano.dur_medico_leito:.2f}s)")
+            libera(RECURSO_MEDICO)
+            etapa[i] = ETAPA_REPOUSO
+            agenda(i, plano.dur_leito)
+        elif e == ETAPA_REPOUSO:
+            registra(i, f"alta do leito após {plano.dur_leito:.2f}s")
+            libera(RECURSO_LEITO)
+            avanca(i, ETAPA_ALTA)
+
+    saida.append(f"=== SIMULAÇÃO CONCLUÍDA: {n_patientes} pacientes em {agora:.2f}s simulados, "
+                 f"espera média por recursos {sum(espera) / max(n_patientes, 1):.2f}s ===\n")
+    sys.stdout.write("".join(saida))
+    return agora
 
 if __name__ == "__main__":
-    random.seed(42)
-    run_simulation()
+    parser = argparse.ArgumentParser(description="Simulador de hospital com threads e semáforos")
+    parser.add_argument("--delay-log", type=float, default=LOG_DELAY,
+                        help=f"delay entre mensagens exibidas, em segundos (padrão: {LOG_DELAY}; 0 desativa)")
+    parser.add_argument("--tempo-max", type=float, default=None,
+                        help="tempo máximo da simulação com threads antes do watchdog abortar, em segundos "
+                             f"(padrão: {TEMPO_MAX_POR_PACIENTE:.0f}s por paciente, mínimo {TEMPO_MAX_SIMULACAO}s; "
+                             "0 desativa)")
+    parser.add_argument("--modo", choices=("threads", "eventos"), default="threads",
+                        help="threads: tempo real com uma thread por paciente; "
+                             "eventos: simulação por eventos discretos, sem esperas reais")
+    args = parser.parse_args()
+    if args.tempo_max is not None and args.tempo_max < 0:
+        parser.error("--tempo-max não pode ser negativo")
+
+    if args.modo == "eventos":
+        run_simulation_eventos()
+    else:
+        run_simulation(log_delay=args.delay_log, tempo_max=args.tempo_max)